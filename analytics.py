@@ -0,0 +1,158 @@
+"""Vectorized sales analytics for the ANALYTICS tab (needs NumPy).
+
+Rows are pulled from `sales` in chunks straight into columnar arrays; every
+breakdown below is a bincount / cumsum over those arrays, so a year of
+transactions costs a handful of array passes instead of a Python loop per row.
+"""
+import datetime as dt
+import time
+
+import numpy as np
+
+CHUNK_ROWS = 20000
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def local_utc_offset():
+    """Seconds east of UTC for this machine (sales.created_at is stored in UTC)."""
+    return time.localtime().tm_gmtoff
+
+
+def _utc_str(d):
+    """Local midnight of date `d` as a UTC 'YYYY-MM-DD HH:MM:SS' string."""
+    ts = dt.datetime.combine(d, dt.time()).timestamp()
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SalesFrame:
+    """Columnar sales for [start, end] (local dates, inclusive).
+
+    pid, qty, total (centavos), ts (UTC epoch seconds) and cat (category code per row) are
+    equal-length arrays; names maps product id -> description and categories
+    maps category code -> name.
+    """
+    def __init__(self, start, end, pid, qty, total, ts, cat, names, categories, offset):
+        self.start, self.end = start, end
+        self.pid, self.qty, self.total, self.ts, self.cat = pid, qty, total, ts, cat
+        self.names, self.categories, self.offset = names, categories, offset
+
+    def __len__(self):
+        return len(self.pid)
+
+    @property
+    def local_day(self):
+        """Day index from `start` (0-based) in local time."""
+        start_day = (dt.datetime.combine(self.start, dt.time()).timestamp() + self.offset) // 86400
+        return ((self.ts + self.offset) // 86400 - int(start_day)).astype(np.int64)
+
+    @property
+    def hour(self):
+        return ((self.ts + self.offset) // 3600 % 24).astype(np.int64)
+
+    @property
+    def weekday(self):
+        # 1970-01-01 was a Thursday; Monday = 0
+        return (((self.ts + self.offset) // 86400 + 3) % 7).astype(np.int64)
+
+
+def load_sales_frame(conn, start, end, total_sql, offset=None):
+    """Load sales for local dates [start, end]. `total_sql` is the caller's SQL
+    expression for a sale's total in centavos (ronys.SALE_TOTAL_C)."""
+    offset = local_utc_offset() if offset is None else offset
+    lo, hi = _utc_str(start), _utc_str(end + dt.timedelta(days=1))
+    cur = conn.cursor()
+    # one read transaction, so the fact rows and the lookups below see the same sales
+    own_txn = not conn.in_transaction
+    if own_txn: cur.execute("BEGIN")
+    try:
+        cur.execute(f"""SELECT COALESCE(product_id, 0), COALESCE(qty, 0), {total_sql},
+                               CAST(strftime('%s', created_at) AS INTEGER)
+                        FROM sales WHERE created_at >= ? AND created_at < ?""", (lo, hi))
+        chunks = []
+        while True:
+            rows = cur.fetchmany(CHUNK_ROWS)
+            if not rows: break
+            chunks.append(np.array(rows, dtype=np.float64).reshape(-1, 4))
+
+        # dimension lookups (one row per product, not per sale)
+        cur.execute("""SELECT COALESCE(product_id, 0), MAX(description) FROM sales
+                       WHERE created_at >= ? AND created_at < ? GROUP BY 1""", (lo, hi))
+        names = dict(cur.fetchall())
+        cur.execute("SELECT id, COALESCE(TRIM(category), '') FROM products")
+        prod_cat = dict(cur.fetchall())
+    finally:
+        if own_txn: conn.rollback()
+
+    data = np.concatenate(chunks) if chunks else np.empty((0, 4))
+    pid = data[:, 0].astype(np.int64)
+    qty = data[:, 1].astype(np.int64)
+    total = data[:, 2].astype(np.int64)
+    ts = data[:, 3].astype(np.int64)
+
+    categories = sorted({prod_cat.get(p, "") for p in names})
+    code = {c: i for i, c in enumerate(categories)}
+    lut = np.zeros(max([int(pid.max()) if len(pid) else 0] + list(names)) + 1, dtype=np.int64)
+    for p in names:
+        lut[p] = code[prod_cat.get(p, "")]
+    cat = lut[pid]
+    return SalesFrame(start, end, pid, qty, total, ts, cat, names, categories, offset)
+
+
+def by_product(frame, top=None):
+    """[(pid, description, qty, sales_c)] sorted by sales, highest first."""
+    if not len(frame): return []
+    ids, inv = np.unique(frame.pid, return_inverse=True)
+    qty = np.bincount(inv, weights=frame.qty, minlength=len(ids))
+    sales = np.bincount(inv, weights=frame.total, minlength=len(ids))
+    order = np.argsort(-sales, kind="stable")[:top]
+    return [(int(ids[i]), frame.names.get(int(ids[i]), ""), int(qty[i]), int(sales[i])) for i in order]
+
+
+def by_category(frame):
+    """[(category, qty, sales_c)] sorted by sales, highest first."""
+    n = len(frame.categories)
+    if not len(frame) or not n: return []
+    qty = np.bincount(frame.cat, weights=frame.qty, minlength=n)
+    sales = np.bincount(frame.cat, weights=frame.total, minlength=n)
+    order = np.argsort(-sales, kind="stable")
+    return [(frame.categories[i] or "(none)", int(qty[i]), int(sales[i])) for i in order]
+
+
+def hour_weekday_matrix(frame):
+    """7x24 array of sales; rows Mon..Sun, columns hour 0..23 (local time)."""
+    cells = np.bincount(frame.weekday * 24 + frame.hour, weights=frame.total, minlength=7 * 24)
+    return cells.reshape(7, 24)
+
+
+def daily_totals(frame):
+    """Sales per local day from start to end, zero-filled."""
+    days = (frame.end - frame.start).days + 1
+    d = frame.local_day
+    keep = (d >= 0) & (d < days)
+    return np.bincount(d[keep], weights=frame.total[keep], minlength=days)
+
+
+def moving_average(values, window):
+    """Trailing mean; the first window-1 points average over what is available."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values): return values
+    c = np.cumsum(np.concatenate(([0.0], values)))
+    idx = np.arange(1, len(values) + 1)
+    lo = np.maximum(idx - window, 0)
+    return (c[idx] - c[lo]) / (idx - lo)
+
+
+def subset(frame, start, end):
+    """Rows of `frame` that fall on local dates start..end (inclusive)."""
+    d = frame.local_day
+    lo, hi = (start - frame.start).days, (end - frame.start).days
+    m = (d >= lo) & (d <= hi)
+    return SalesFrame(start, end, frame.pid[m], frame.qty[m], frame.total[m], frame.ts[m], frame.cat[m],
+                      frame.names, frame.categories, frame.offset)
+
+
+def compare_periods(cur, prev):
+    """(current_total, previous_total, pct_change or None) for two frames; totals in centavos."""
+    cur_total, prev_total = int(cur.total.sum()), int(prev.total.sum())
+    pct = None if prev_total == 0 else (cur_total - prev_total) / prev_total * 100.0
+    return cur_total, prev_total, pct
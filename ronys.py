@@ -1,14 +1,91 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 import sqlite3
 import datetime as dt
 import calendar as cal
+import json
+import sys
+import uuid
+import queue
+import threading
+import itertools
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+try:
+    import analytics          # needs NumPy; the ANALYTICS tab explains if it's missing
+except ImportError:
+    analytics = None
 
 DB_NAME = "store_v2.db"
 
+SYNC_USAGE = ("usage: python ronys.py export <since_seq> <out.jsonl>\n"
+              "       python ronys.py import <central.db> <in.jsonl>")
+
+# ------------------ HQ IMPORT (central side; needs no branch DB) ------------------
+def import_changes(central_db, in_path):
+    """Apply an export file to the central DB. Entries already applied (seq <= last seen
+    for that store) are skipped, so re-importing the same file is harmless. Seqs have no
+    gaps, so a missing range (files out of order, wrong <since_seq>) rejects the whole
+    file with ValueError and nothing from it is applied."""
+    hq = sqlite3.connect(central_db)
+    hc = hq.cursor()
+    hc.execute("""CREATE TABLE IF NOT EXISTS hq_sync (
+                      store_id TEXT PRIMARY KEY,
+                      last_seq INTEGER NOT NULL)""")
+    hc.execute("""CREATE TABLE IF NOT EXISTS hq_rows (
+                      store_id TEXT,
+                      tbl TEXT,
+                      row_id INTEGER,
+                      data TEXT,
+                      seq INTEGER,
+                      updated_at DATETIME,
+                      PRIMARY KEY (store_id, tbl, row_id))""")
+    applied = skipped = 0
+    last_seen = {}
+    with open(in_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip(): continue
+            e = json.loads(line)
+            sid = e["store_id"]
+            if sid not in last_seen:
+                hc.execute("SELECT last_seq FROM hq_sync WHERE store_id=?", (sid,))
+                r = hc.fetchone()
+                last_seen[sid] = r[0] if r else 0
+            if e["seq"] <= last_seen[sid]:
+                skipped += 1; continue
+            if e["seq"] != last_seen[sid] + 1:
+                hq.rollback(); hq.close()
+                raise ValueError(f"{in_path}: store {sid} expected seq {last_seen[sid] + 1} but found "
+                                 f"{e['seq']}. Import the earlier export first (or re-export from "
+                                 f"seq {last_seen[sid]}).")
+            if e["op"] == "D":
+                hc.execute("DELETE FROM hq_rows WHERE store_id=? AND tbl=? AND row_id=?",
+                           (sid, e["tbl"], e["row_id"]))
+            else:
+                hc.execute("INSERT OR REPLACE INTO hq_rows (store_id, tbl, row_id, data, seq, updated_at) "
+                           "VALUES (?,?,?,?,?,?)",
+                           (sid, e["tbl"], e["row_id"], json.dumps(e["data"]), e["seq"], e["at"]))
+            hc.execute("INSERT OR REPLACE INTO hq_sync (store_id, last_seq) VALUES (?,?)", (sid, e["seq"]))
+            last_seen[sid] = e["seq"]
+            applied += 1
+    hq.commit(); hq.close()
+    return applied, skipped
+
+# At HQ there is no branch database, so handle `import` before the setup below
+# creates one in the current directory.
+if __name__ == "__main__" and sys.argv[1:2] == ["import"]:
+    if len(sys.argv) != 4: sys.exit(SYNC_USAGE)
+    try:
+        applied, skipped = import_changes(sys.argv[2], sys.argv[3])
+    except (OSError, ValueError) as e:
+        sys.exit(f"Import failed: {e}")
+    print(f"Applied {applied} change(s), skipped {skipped} already imported.")
+    sys.exit(0)
+
 # ------------------ DB SETUP ------------------
 conn = sqlite3.connect(DB_NAME)
 cursor = conn.cursor()
+cursor.execute("PRAGMA journal_mode=WAL")   # lets the read worker query while we write
 
 cursor.execute("""
 CREATE TABLE IF NOT EXISTS products (
@@ -55,8 +132,443 @@ CREATE TABLE IF NOT EXISTS sales (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 )
 """)
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_created ON sales(created_at)")
+conn.commit()
+
+# ------------------ MONEY (integer centavos) ------------------
+# Every peso amount is kept as an INTEGER number of centavos in a *_c column.
+# The old REAL columns are still written (c / 100) so older copies of the app
+# can read the file, but nothing here reads them except the migration below.
+MONEY_COLUMNS = {
+    "products": ("unit_price", "selling_price", "income_price"),
+    "sales": ("price_each", "total", "payment", "change"),
+}
+MIGRATE_CHUNK_ROWS = 2000
+
+def ensure_centavo_columns():
+    for tbl, money_cols in MONEY_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_info({tbl})")
+        cols = [c[1] for c in cursor.fetchall()]
+        for col in money_cols:
+            if f"{col}_c" not in cols:
+                cursor.execute(f"ALTER TABLE {tbl} ADD COLUMN {col}_c INTEGER")
+    conn.commit()
+
+ensure_centavo_columns()
+
+def to_cents(value):
+    """'12.5', 12.5 or None -> 1250 (half-up). Raises ValueError on anything else."""
+    if value is None or str(value).strip() == "": return 0
+    try:
+        return int((Decimal(str(value).strip().replace(",", "")) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"not an amount: {value!r}")
+
+def fmt_cents(c, grouping=False):
+    """1234567 -> '12345.67' (or '12,345.67' with grouping)."""
+    c = int(c or 0)
+    q, r = divmod(abs(c), 100)
+    return f"{'-' if c < 0 else ''}{q:,}.{r:02d}" if grouping else f"{'-' if c < 0 else ''}{q}.{r:02d}"
+
+def cents_sql(col):
+    """SQL for a money column in centavos, falling back to the REAL column for rows
+    the migration hasn't reached yet."""
+    return f"COALESCE({col}_c, CAST(ROUND(COALESCE({col},0)*100) AS INTEGER))"
+
+# sales.total was sometimes saved as 0; the report then used qty * price_each
+SALE_TOTAL_C = ("COALESCE(total_c, CASE WHEN COALESCE(total,0)=0 "
+                f"THEN COALESCE(qty,0)*{cents_sql('price_each')} ELSE {cents_sql('total')} END)")
+
+def migrate_money_step(chunk=MIGRATE_CHUNK_ROWS):
+    """Fill *_c for the next `chunk` rows (by id) and commit. Returns rows done (0 = finished).
+
+    Progress is a keyset cursor per table kept in meta ('money_upto:<table>'), so each
+    step is an index range on the primary key no matter how much is already migrated.
+    """
+    cursor.execute("SELECT value FROM meta WHERE key='money_migrated'")
+    if cursor.fetchone(): return 0
+    for tbl, money_cols in MONEY_COLUMNS.items():
+        cursor.execute("SELECT value FROM meta WHERE key=?", (f"money_upto:{tbl}",))
+        r = cursor.fetchone()
+        upto = int(r[0]) if r else 0
+        cursor.execute(f"SELECT MAX(id), COUNT(*) FROM (SELECT id FROM {tbl} WHERE id>? ORDER BY id LIMIT ?)",
+                       (upto, chunk))
+        last_id, n = cursor.fetchone()
+        if not n: continue
+        # cents_sql / SALE_TOTAL_C keep an existing *_c, so re-running a range is harmless
+        sets = ", ".join(f"{c}_c={SALE_TOTAL_C if (tbl, c) == ('sales', 'total') else cents_sql(c)}"
+                         for c in money_cols)
+        missing = " OR ".join(f"{c}_c IS NULL" for c in money_cols)
+        cursor.execute(f"SELECT id FROM {tbl} WHERE id>? AND id<=? AND ({missing})", (upto, last_id))
+        changed = {r[0] for r in cursor.fetchall()}
+        cursor.execute(f"UPDATE {tbl} SET {sets} WHERE id>? AND id<=?", (upto, last_id))
+        if changed:
+            # journal the rewritten rows in this same commit so HQ gets the centavo values too
+            cursor.execute(f"SELECT * FROM {tbl} WHERE id>? AND id<=?", (upto, last_id))
+            cols = [c[0] for c in cursor.description]
+            cursor.executemany("INSERT INTO change_log (tbl, op, row_id, data) VALUES (?, 'U', ?, ?)",
+                               [(tbl, r[0], json.dumps(dict(zip(cols, r)))) for r in cursor.fetchall()
+                                if r[0] in changed])
+        cursor.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"money_upto:{tbl}", last_id))
+        conn.commit()
+        return n
+    cursor.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('money_migrated', '1')")
+    conn.commit()
+    return 0
+
+# ------------------ CHANGE JOURNAL (branch -> HQ sync) ------------------
+# log_change() doesn't commit: writers call it before their own commit so the
+# entry is saved atomically with the write it describes.
+cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='change_log'")
+_seed_change_log = cursor.fetchone() is None
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+)
+""")
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT,
+    op TEXT,            -- 'I' insert, 'U' update, 'D' delete
+    row_id INTEGER,
+    data TEXT,          -- JSON of the row after the change (NULL on delete)
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""")
+conn.commit()
+
+def get_store_id():
+    """Stable id of this branch; generated once and kept in the meta table."""
+    cursor.execute("SELECT value FROM meta WHERE key='store_id'")
+    r = cursor.fetchone()
+    if r: return r[0]
+    sid = uuid.uuid4().hex
+    cursor.execute("INSERT INTO meta (key, value) VALUES ('store_id', ?)", (sid,))
+    conn.commit()
+    return sid
+
+def row_as_dict(tbl, row_id):
+    cursor.execute(f"SELECT * FROM {tbl} WHERE id=?", (row_id,))
+    r = cursor.fetchone()
+    if r is None: return None
+    return dict(zip([c[0] for c in cursor.description], r))
+
+def log_change(tbl, op, row_id):
+    """Journal one write."""
+    data = None if op == "D" else row_as_dict(tbl, row_id)
+    cursor.execute("INSERT INTO change_log (tbl, op, row_id, data) VALUES (?,?,?,?)",
+                   (tbl, op, row_id, json.dumps(data) if data is not None else None))
+
+if _seed_change_log:
+    # one-time: rows that predate the journal go out as inserts, so `export 0` is complete
+    for tbl in ("products", "sales"):
+        cursor.execute(f"SELECT * FROM {tbl} ORDER BY id")
+        cols = [c[0] for c in cursor.description]
+        rows = cursor.fetchall()
+        cursor.executemany("INSERT INTO change_log (tbl, op, row_id, data) VALUES (?, 'I', ?, ?)",
+                           [(tbl, r[0], json.dumps(dict(zip(cols, r)))) for r in rows])
+    conn.commit()
+
+def export_changes(since_seq, out_path):
+    """Write every journal entry with seq > since_seq as JSON lines. Returns the last seq written."""
+    sid = get_store_id()
+    last = since_seq
+    cursor.execute("SELECT seq, tbl, op, row_id, data, created_at FROM change_log WHERE seq>? ORDER BY seq",
+                   (since_seq,))
+    with open(out_path, "w", encoding="utf-8") as f:
+        for seq, tbl, op, row_id, data, when in cursor.fetchall():
+            f.write(json.dumps({"store_id": sid, "seq": seq, "tbl": tbl, "op": op, "row_id": row_id,
+                                "data": json.loads(data) if data else None, "at": when}) + "\n")
+            last = seq
+    return last
+
+# ------------------ STOCK LEDGER + SNAPSHOTS ------------------
+SNAPSHOT_INTERVAL_DAYS = 1   # take a stock snapshot at most this often
+
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS stock_moves (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER,
+    description TEXT,
+    kind TEXT,          -- 'add', 'sale', 'restock', 'adjust', 'delete'
+    delta INTEGER,
+    qty_after INTEGER,
+    ref_id INTEGER,     -- sales.id for 'sale'
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+""")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_moves_created ON stock_moves(created_at)")
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS stock_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_move_id INTEGER    -- moves with id <= this are already reflected
+)
+""")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_snapshots_taken ON stock_snapshots(taken_at)")
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS stock_snapshot_items (
+    snapshot_id INTEGER,
+    product_id INTEGER,
+    description TEXT,
+    quantity INTEGER,
+    PRIMARY KEY (snapshot_id, product_id)
+)
+""")
+conn.commit()
+
+def record_move(product_id, description, kind, delta, qty_after, ref_id=None):
+    """Append one inventory movement (no commit; part of the caller's write)."""
+    cursor.execute("INSERT INTO stock_moves (product_id, description, kind, delta, qty_after, ref_id) "
+                   "VALUES (?,?,?,?,?,?)", (product_id, description, kind, delta, qty_after, ref_id))
+
+def take_stock_snapshot():
+    cursor.execute("SELECT COALESCE(MAX(id),0) FROM stock_moves")
+    last_move = cursor.fetchone()[0]
+    cursor.execute("INSERT INTO stock_snapshots (last_move_id, taken_at) VALUES (?, CURRENT_TIMESTAMP)", (last_move,))
+    snap_id = cursor.lastrowid
+    cursor.execute("""INSERT INTO stock_snapshot_items (snapshot_id, product_id, description, quantity)
+                      SELECT ?, id, description, COALESCE(quantity,0) FROM products""", (snap_id,))
+    conn.commit()
+
+def maybe_take_stock_snapshot():
+    """Snapshot current stock if the latest snapshot is older than SNAPSHOT_INTERVAL_DAYS."""
+    cursor.execute("SELECT MAX(taken_at) FROM stock_snapshots")
+    last = cursor.fetchone()[0]
+    if last is None:
+        take_stock_snapshot(); return
+    cursor.execute("SELECT julianday('now') - julianday(?)", (last,))
+    if cursor.fetchone()[0] >= SNAPSHOT_INTERVAL_DAYS:
+        take_stock_snapshot()
+
+maybe_take_stock_snapshot()
+
+def local_midnight_utc(d):
+    """Local midnight of date `d` as a UTC 'YYYY-MM-DD HH:MM:SS' string (the created_at clock)."""
+    ts = dt.datetime.combine(d, dt.time()).timestamp()
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def stock_as_of(when, db=None):
+    """Stock per product just before `when` (UTC 'YYYY-MM-DD HH:MM:SS', same clock as created_at).
+
+    Starts from the snapshot nearest in time and replays only the ledger entries
+    between it and `when` (forwards, or backwards if the snapshot is later).
+    Returns {product_id: (description, quantity)}.
+    """
+    cur = (db or conn).cursor()
+    cur.execute("""SELECT id, taken_at, last_move_id FROM stock_snapshots
+                      ORDER BY ABS(julianday(taken_at) - julianday(?)), id DESC LIMIT 1""", (when,))
+    snap = cur.fetchone()
+    stock = {}
+    if snap is None:
+        base_move, sign = 0, 1
+        moves_sql = "SELECT product_id, description, delta FROM stock_moves WHERE created_at<? ORDER BY id"
+        moves_params = (when,)
+    else:
+        snap_id, taken_at, base_move = snap
+        cur.execute("SELECT product_id, description, quantity FROM stock_snapshot_items WHERE snapshot_id=?",
+                       (snap_id,))
+        for pid, desc, q in cur.fetchall():
+            stock[pid] = (desc, q)
+        # both ends of the id range are bounded, so only the moves between the
+        # snapshot and `when` are read (ids and created_at grow together)
+        if taken_at <= when:
+            sign = 1
+            cur.execute("""SELECT id FROM stock_moves WHERE created_at<?
+                           ORDER BY created_at DESC, id DESC LIMIT 1""", (when,))
+            r = cur.fetchone()
+            moves_sql = ("SELECT product_id, description, delta FROM stock_moves "
+                         "WHERE id>? AND id<=? ORDER BY id")
+            moves_params = (base_move, r[0] if r else 0)
+        else:
+            sign = -1
+            cur.execute("""SELECT id FROM stock_moves WHERE created_at>=?
+                           ORDER BY created_at, id LIMIT 1""", (when,))
+            r = cur.fetchone()
+            moves_sql = ("SELECT product_id, description, delta FROM stock_moves "
+                         "WHERE id>=? AND id<=? ORDER BY id DESC")
+            moves_params = (r[0] if r else base_move + 1, base_move)
+    cur.execute(moves_sql, moves_params)
+    for pid, desc, delta in cur.fetchall():
+        old_desc, q = stock.get(pid, (desc, 0))
+        stock[pid] = (old_desc or desc, q + sign * (delta or 0))
+    return stock
+
+def stock_movement_report(start_date, end_date, db=None):
+    """Opening/in/out/closing per product for an inclusive range of local dates.
+    Returns rows (pid, desc, opening, added, restocked, sold, adjusted, closing)."""
+    db = db or conn
+    cur = db.cursor()
+    lo, hi = local_midnight_utc(start_date), local_midnight_utc(end_date + dt.timedelta(days=1))
+    # one read transaction so opening, closing and the moves agree with each other
+    own_txn = not db.in_transaction
+    if own_txn: cur.execute("BEGIN")
+    try:
+        opening = stock_as_of(lo, db)
+        closing = stock_as_of(hi, db)
+        cur.execute("""SELECT product_id, MAX(description), kind, SUM(delta) FROM stock_moves
+                          WHERE created_at>=? AND created_at<?
+                          GROUP BY product_id, kind""", (lo, hi))
+        moves = cur.fetchall()
+    finally:
+        if own_txn: db.rollback()
+    moved = {}
+    names = {pid: d for pid, (d, _) in list(opening.items()) + list(closing.items())}
+    for pid, desc, kind, total in moves:
+        moved.setdefault(pid, {})[kind] = total or 0
+        names.setdefault(pid, desc)
+    rows = []
+    for pid in sorted(names, key=lambda p: (names[p] or "").lower()):
+        m = moved.get(pid, {})
+        o = opening.get(pid, (None, 0))[1]; c = closing.get(pid, (None, 0))[1]
+        if o == 0 and c == 0 and not m: continue
+        rows.append((pid, names[pid] or "", o, m.get("add", 0), m.get("restock", 0), -m.get("sale", 0),
+                     m.get("adjust", 0) + m.get("delete", 0), c))
+    return rows
+
+
+# ------------------ SALES VELOCITY (reorder forecast) ------------------
+VELOCITY_SPAN_DAYS = 14                        # EWMA span; older days fade out
+VELOCITY_ALPHA = 2.0 / (VELOCITY_SPAN_DAYS + 1)
+
+cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='product_stats'")
+_seed_stats = cursor.fetchone() is None
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS product_stats (
+    product_id INTEGER PRIMARY KEY,
+    ewma REAL,          -- smoothed units/day over completed days up to last_day-1 (NULL: none yet)
+    last_day TEXT,      -- 'YYYY-MM-DD' of the latest sale
+    day_qty INTEGER     -- units sold so far on last_day
+)
+""")
 conn.commit()
 
+def _fold_day(ewma, last_day, day_qty, day, qty):
+    """Add `qty` sold on `day` to the running stats (days must not go backwards).
+    The average starts at the first completed day's quantity rather than 0, so a
+    new product isn't under-forecast for its first couple of weeks."""
+    if last_day is None:
+        return None, day, qty
+    if day <= last_day:
+        return ewma, last_day, day_qty + qty
+    gap = (dt.date.fromisoformat(day) - dt.date.fromisoformat(last_day)).days
+    ewma = day_qty if ewma is None else VELOCITY_ALPHA * day_qty + (1 - VELOCITY_ALPHA) * ewma
+    ewma *= (1 - VELOCITY_ALPHA) ** (gap - 1)   # days with no sales
+    return ewma, day, qty
+
+def update_sales_stats(product_id, qty, day=None):
+    """O(1) update on each sale (no commit; part of the caller's write)."""
+    day = day or dt.date.today().isoformat()
+    cursor.execute("SELECT ewma, last_day, day_qty FROM product_stats WHERE product_id=?", (product_id,))
+    r = cursor.fetchone() or (None, None, 0)
+    cursor.execute("INSERT OR REPLACE INTO product_stats (product_id, ewma, last_day, day_qty) VALUES (?,?,?,?)",
+                   (product_id, *_fold_day(r[0], r[1], r[2], day, qty)))
+
+def sales_velocity(ewma, last_day, day_qty, today=None):
+    """Estimated units/day as of `today` from a product_stats row."""
+    if last_day is None: return 0.0
+    today = today or dt.date.today()
+    v = (day_qty or 0) if ewma is None else VELOCITY_ALPHA * (day_qty or 0) + (1 - VELOCITY_ALPHA) * ewma
+    idle = (today - dt.date.fromisoformat(last_day)).days - 1   # full days since, no sales
+    if idle > 0: v *= (1 - VELOCITY_ALPHA) ** idle
+    return v
+
+def load_velocities(db=None):
+    today = dt.date.today()
+    rows = (db or conn).execute("SELECT product_id, ewma, last_day, day_qty FROM product_stats").fetchall()
+    return {pid: sales_velocity(e, d, q, today) for pid, e, d, q in rows}
+
+def days_of_cover(stock, velocity):
+    """Days until the stock runs out at the current velocity; None if it isn't selling."""
+    if (stock or 0) <= 0: return 0.0
+    if velocity <= 1e-9: return None
+    return stock / velocity
+
+if _seed_stats:
+    # one-time backfill from existing sales, one row per product per local day
+    # (created_at is UTC; live updates bucket by dt.date.today())
+    cursor.execute("""SELECT product_id, DATE(created_at, 'localtime') AS day, SUM(qty) FROM sales
+                      WHERE product_id IS NOT NULL GROUP BY product_id, day
+                      ORDER BY product_id, day""")
+    for pid, day, qty in cursor.fetchall():
+        update_sales_stats(pid, qty or 0, day)
+    conn.commit()
+
+
+# ------------------ READ WORKER (keeps queries off the Tk thread) ------------------
+class ReadExecutor:
+    """Runs read-only queries on worker threads, each with its own read-only connection.
+
+    submit(key, fn, on_done) calls fn(db) on a worker and later on_done(result)
+    on the Tk thread (results are collected by a root.after poll). A newer submit
+    with the same key makes older ones stale: they are skipped if not started yet,
+    interrupted if running, and their results are never delivered.
+    """
+    def __init__(self, root, db_path, workers=2, poll_ms=30):
+        self.root = root; self.poll_ms = poll_ms
+        self._jobs = queue.Queue(); self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._gen = itertools.count(1)
+        self._latest = {}     # key -> newest generation
+        self._running = {}    # key -> (generation, connection)
+        for _ in range(workers):
+            threading.Thread(target=self._work, args=(db_path,), daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, key, fn, on_done, on_error=None):
+        gen = next(self._gen)
+        with self._lock:
+            self._latest[key] = gen
+            running = self._running.get(key)
+            if running: running[1].interrupt()
+        self._jobs.put((key, gen, fn, on_done, on_error))
+
+    def _stale(self, key, gen):
+        return self._latest.get(key) != gen
+
+    def _work(self, db_path):
+        db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        while True:
+            key, gen, fn, on_done, on_error = self._jobs.get()
+            with self._lock:
+                if self._stale(key, gen): continue
+                self._running[key] = (gen, db)
+            try:
+                result, err = fn(db), None
+            except Exception as e:
+                result, err = None, e
+            with self._lock:
+                if self._running.get(key, (None,))[0] == gen: del self._running[key]
+            self._results.put((key, gen, result, err, on_done, on_error))
+
+    def _poll(self):
+        try:
+            while True:
+                try: key, gen, result, err, on_done, on_error = self._results.get_nowait()
+                except queue.Empty: break
+                with self._lock:
+                    if self._stale(key, gen): continue
+                # one failing callback must not stop delivery of the others
+                try:
+                    if err is None: on_done(result)
+                    elif on_error: on_error(err)
+                    else: messagebox.showerror("Database error", f"Hindi ma-load:\n{err}")
+                except Exception:
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+def query_categories(db):
+    """Distinct non-empty categories only."""
+    return [r[0] for r in db.execute("""
+        SELECT DISTINCT TRIM(category)
+        FROM products
+        WHERE TRIM(COALESCE(category,'')) <> ''
+        ORDER BY 1
+    """).fetchall()]
+
 
 # ------------------ MAIN APP ------------------
 class BigTabPOS:
@@ -68,6 +580,8 @@ class BigTabPOS:
 
         # Configurable threshold for "expiring soon"
         self.expiry_threshold_days = 7
+        # Configurable horizon for "reorder soon" (days of cover left)
+        self.reorder_horizon_days = 7
         self._maintenance_notified = False   # avoid multiple popups per open
 
         # Excel-ish Treeview theme
@@ -95,34 +609,63 @@ class BigTabPOS:
                                 bg="#8B0000", fg="white", relief="flat",
                                 activebackground="#600000",
                                 command=lambda: self.show_tab("REPORT")),
+            "ANALYTICS": tk.Button(bar, text="ANALYTICS", font=("Poppins", 14, "bold"),
+                                   bg="#8B0000", fg="white", relief="flat",
+                                   activebackground="#600000",
+                                   command=lambda: self.show_tab("ANALYTICS")),
         }
         for b in self.tabs.values():
             b.pack(side="left", fill="x", expand=True, padx=(0,1))
 
         self.content = tk.Frame(self.root, bg="#F5DEB3"); self.content.pack(fill="both", expand=True)
         self.active_tab = None
+        self.reader = ReadExecutor(self.root, DB_NAME)
         self.show_tab("SELLING")
+        self.root.after(200, self._migrate_money)
+
+    def _migrate_money(self):
+        """Convert old REAL money rows to centavos a chunk at a time between UI events."""
+        if migrate_money_step():
+            self.root.after(20, self._migrate_money)
 
     def show_tab(self, name):
         self.active_tab = name
+        maybe_take_stock_snapshot()
         for w in self.content.winfo_children(): w.destroy()
         for n, b in self.tabs.items(): b.config(bg="#8B0000" if n != name else "#A52A2A")
         if name == "SELLING": self.selling_tab()
         elif name == "MAINTENANCE":
             self._maintenance_notified = False  # reset per entry
             self.maintenance_tab()
+        elif name == "ANALYTICS": self.analytics_tab()
         else: self.report_tab()
 
     # ---------- shared ----------
-    def get_categories(self):
-        """Return distinct non-empty categories only."""
-        cursor.execute("""
-            SELECT DISTINCT TRIM(category)
-            FROM products
-            WHERE TRIM(COALESCE(category,'')) <> ''
-            ORDER BY 1
-        """)
-        return [r[0] for r in cursor.fetchall()]
+    def get_categories(self, on_done):
+        """Fetch distinct non-empty categories in the background, then call on_done(list)."""
+        self.reader.submit("categories", query_categories, on_done)
+
+    def _read(self, key, tv, fn, on_done):
+        """Run fn(db) on the read worker with a loading badge on `tv`; on_done(result)
+        runs only if `tv` still exists (the tab may have been switched meanwhile)."""
+        self._set_loading(tv, True)
+        def done(result):
+            if not tv.winfo_exists(): return
+            self._set_loading(tv, False); on_done(result)
+        def failed(err):
+            if tv.winfo_exists(): self._set_loading(tv, False)
+            messagebox.showerror("Database error", f"Hindi ma-load:\n{err}")
+        self.reader.submit(key, fn, done, failed)
+
+    def _set_loading(self, tv, on):
+        lbl = getattr(tv, "_loading_lbl", None)
+        if on:
+            if lbl is None:
+                lbl = tv._loading_lbl = tk.Label(tv, text="⏳ Loading…", font=("Calibri", 10, "bold"),
+                                                 bg="#FFF9C4", fg="#8B0000", padx=6)
+            lbl.place(relx=1.0, rely=0.0, anchor="ne", x=-4, y=28)
+        elif lbl is not None:
+            lbl.place_forget()
 
     # ================= SELLING (Quick-Sell) =================
     def selling_tab(self):
@@ -137,7 +680,8 @@ class BigTabPOS:
                  bg=BRAND_BG, fg=BRAND_DARK).pack(side="left", padx=(0,8))
 
         # ---------- NEW: Search bar with auto-suggest ----------
-        self._all_cats = self.get_categories()
+        self._all_cats = []
+        self.get_categories(lambda cats: setattr(self, "_all_cats", cats))
         self.selected_category = ""  # current filter
         self._cat_suggest_win = None  # toplevel for suggestions
 
@@ -165,6 +709,7 @@ class BigTabPOS:
         self.prod_tv.pack(fill="both", expand=True, pady=(4,0))
         self.prod_tv.tag_configure("oddrow", background="#FFFFFF")
         self.prod_tv.tag_configure("evenrow", background="#F9F9F9")
+        self.prod_tv.tag_configure("reorder", foreground="#E65100", font=("Calibri", 11, "bold"))
         self.prod_tv.bind("<Double-1>", self._on_pick_product)
         self.prod_tv.bind("<<TreeviewSelect>>", self._on_pick_product)
 
@@ -177,7 +722,7 @@ class BigTabPOS:
                  bg="#FFF3D6").pack(pady=(0,6))
 
         form = tk.Frame(right, bg="#FFF3D6"); form.pack(padx=14, pady=6, anchor="w")
-        self.sel_price = tk.DoubleVar(value=0.0)
+        self.sel_price = tk.StringVar(value="0.00")
         self.sel_stock = tk.IntVar(value=0)
         tk.Label(form, text="Price (₱):", font=("Poppins", 12, "bold"), bg="#FFF3D6", fg=BRAND_DARK)\
             .grid(row=0, column=0, sticky="e", padx=6, pady=4)
@@ -348,28 +893,40 @@ class BigTabPOS:
         self._load_products()
 
     def _refresh_cats(self):
-        self._all_cats = self.get_categories()
-        # Refresh suggestions based on current typing
-        self._on_cat_search()
+        def done(cats):
+            if not self.cat_search.winfo_exists(): return   # left SELLING meanwhile
+            self._all_cats = cats
+            # Refresh suggestions based on current typing
+            self._on_cat_search()
+        self.get_categories(done)
 
     # ---------- product list handlers ----------
     def _load_products(self):
         cat = (self.selected_category or "").strip()
-        sql = "SELECT id, description, selling_price, quantity FROM products WHERE 1=1"
+        sql = f"SELECT id, description, {cents_sql('selling_price')}, quantity FROM products WHERE 1=1"
         params = []
         if cat:
             sql += " AND TRIM(COALESCE(category,'')) LIKE ?"
             params.append(f"%{cat}%")
         sql += " ORDER BY description COLLATE NOCASE"
 
+        def query(db):
+            return db.execute(sql, params).fetchall(), load_velocities(db)
+        self._read("products", self.prod_tv, query, self._fill_products)
+
+    def _fill_products(self, result):
+        rows, vel = result
         self.prod_tv.delete(*self.prod_tv.get_children())
-        cursor.execute(sql, params)
-        for i,row in enumerate(cursor.fetchall()):
-            self.prod_tv.insert("", "end", values=row, tags=("evenrow" if i%2==0 else "oddrow",))
+        for i,row in enumerate(rows):
+            tags = ["evenrow" if i%2==0 else "oddrow"]
+            cover = days_of_cover(row[3], vel.get(row[0], 0.0))
+            if cover is not None and cover <= self.reorder_horizon_days: tags.append("reorder")
+            pid, desc, price_c, stock = row
+            self.prod_tv.insert("", "end", values=(pid, desc, fmt_cents(price_c), stock), tags=tuple(tags))
 
         # reset quick panel
         self.selected = None
-        self.sel_name.set("—"); self.sel_price.set(0.0); self.sel_stock.set(0)
+        self.sel_name.set("—"); self.sel_price.set("0.00"); self.sel_stock.set(0)
         self.qty_var.set(""); self.total_var.set("0.00"); self.pay_var.set(""); self.change_var.set("0.00")
         self.confirm_btn.config(state="disabled")
 
@@ -377,8 +934,8 @@ class BigTabPOS:
         sel = self.prod_tv.selection()
         if not sel: return
         pid, desc, price, stock = self.prod_tv.item(sel[0])["values"]
-        self.selected = {"id": int(pid), "desc": desc, "price": float(price), "stock": int(stock)}
-        self.sel_name.set(desc); self.sel_price.set(float(price)); self.sel_stock.set(int(stock))
+        self.selected = {"id": int(pid), "desc": desc, "price_c": to_cents(price), "stock": int(stock)}
+        self.sel_name.set(desc); self.sel_price.set(fmt_cents(self.selected["price_c"])); self.sel_stock.set(int(stock))
         self.qty_var.set("1"); self.pay_var.set(""); self._recompute()
 
     def _recompute(self):
@@ -388,15 +945,15 @@ class BigTabPOS:
             q = max(0, int((self.qty_var.get() or "0").strip()))
         except:
             q = 0
-        total = round(q * self.selected["price"], 2)
-        self.total_var.set(f"{total:.2f}")
+        total = q * self.selected["price_c"]
+        self.total_var.set(fmt_cents(total))
 
         try:
-            pay = float((self.pay_var.get() or "0").strip())
-        except:
-            pay = 0.0
-        ch = round(pay - total, 2)
-        self.change_var.set(f"{ch:.2f}")
+            pay = to_cents(self.pay_var.get())
+        except ValueError:
+            pay = 0
+        ch = pay - total
+        self.change_var.set(fmt_cents(ch))
         self.change_lbl.config(fg="#2E7D32" if ch >= 0 else "#C62828")
 
         ok = (self.selected is not None) and (q>0) and (q<=self.selected["stock"]) and (pay>=total)
@@ -411,10 +968,10 @@ class BigTabPOS:
         if qty<=0 or qty>self.selected["stock"]:
             messagebox.showerror("Error", "Not enough stock / invalid qty."); return
         try:
-            pay = float(self.pay_var.get())
-        except:
+            pay = to_cents(self.pay_var.get())
+        except ValueError:
             messagebox.showerror("Error", "Invalid payment."); return
-        total = round(qty * self.selected["price"], 2)
+        total = qty * self.selected["price_c"]
         if pay < total:
             messagebox.showerror("Error", "Kulangi ang bayad."); return
 
@@ -423,13 +980,23 @@ class BigTabPOS:
             new_qty = self.selected["stock"] - qty
             cursor.execute("UPDATE products SET quantity=? WHERE id=?", (new_qty, self.selected["id"]))
             # save sale (explicit CURRENT_TIMESTAMP to guarantee created_at)
+            price = self.selected["price_c"]
             cursor.execute(
-                "INSERT INTO sales (product_id, description, qty, price_each, total, payment, change, created_at) "
-                "VALUES (?,?,?,?,?,?,?, CURRENT_TIMESTAMP)",
-                (self.selected["id"], self.selected["desc"], qty, self.selected["price"], total, pay, pay-total)
+                "INSERT INTO sales (product_id, description, qty, price_each, total, payment, change, "
+                "price_each_c, total_c, payment_c, change_c, created_at) "
+                "VALUES (?,?,?,?,?,?,?,?,?,?,?, CURRENT_TIMESTAMP)",
+                (self.selected["id"], self.selected["desc"], qty,
+                 price/100, total/100, pay/100, (pay-total)/100,
+                 price, total, pay, pay-total)
             )
+            sale_id = cursor.lastrowid
+            record_move(self.selected["id"], self.selected["desc"], "sale", -qty, new_qty, sale_id)
+            update_sales_stats(self.selected["id"], qty)
+            log_change("sales", "I", sale_id)
+            log_change("products", "U", self.selected["id"])
             conn.commit()
         except Exception as e:
+            conn.rollback()
             messagebox.showerror("Database error", f"Nabigong mag-save:\n{e}")
             return
 
@@ -459,7 +1026,9 @@ class BigTabPOS:
             "expired": mk_chip("#FFCDD2", "#8B0000"),  # red
             "soon": mk_chip("#FFF4CE", "#7A5C00"),     # amber
             "ok": mk_chip("#C8E6C9", "#1B5E20"),       # green
+            "reorder": mk_chip("#FFE0B2", "#E65100"),  # orange
         }
+        ttk.Button(banner, text="🛒 Reorder List", command=self.reorder_window).pack(side="right", padx=10)
 
         form = tk.Frame(frame, bg="#F5DEB3"); form.pack(pady=10)
         # NEW FIELD: Expiration (YYYY-MM-DD)
@@ -478,23 +1047,28 @@ class BigTabPOS:
                   bg="#8B0000", fg="white", command=self.add_product).pack(side="left", padx=10)
         tk.Button(btns, text="Delete Product", font=("Poppins", 12, "bold"),
                   bg="#8B0000", fg="white", command=self.delete_product).pack(side="left", padx=10)
+        tk.Button(btns, text="Restock", font=("Poppins", 12, "bold"),
+                  bg="#8B0000", fg="white", command=self.restock_product).pack(side="left", padx=10)
+        tk.Button(btns, text="Adjust Stock", font=("Poppins", 12, "bold"),
+                  bg="#8B0000", fg="white", command=self.adjust_stock).pack(side="left", padx=10)
+        tk.Button(btns, text="📦 Stock History", font=("Poppins", 12, "bold"),
+                  bg="#8B0000", fg="white", command=self.stock_history_window).pack(side="left", padx=10)
 
         # ---- Table: added Expiry + Days Left; color-coding
-        cols=("ID","Category","Unit","Description","Original Price","Selling Price","Qty","Expiry","Days Left")
+        cols=("ID","Category","Unit","Description","Original Price","Selling Price","Qty","Expiry","Days Left","Cover (d)")
         self.tree = ttk.Treeview(frame, columns=cols, show="headings", height=16)
         self.tree.pack(padx=20, pady=10, fill="both", expand=True)
-        for c,w in zip(cols,(70,160,120,440,140,140,80,120,100)):
+        for c,w in zip(cols,(70,160,120,400,130,130,80,120,100,100)):
             self.tree.heading(c, text=c, anchor="center")
             self.tree.column(c, width=w, anchor="center", stretch=True)
         self.tree.tag_configure("oddrow", background="#FFFFFF")
         self.tree.tag_configure("evenrow", background="#F9F9F9")
         self.tree.tag_configure("expired", background="#FFEBEE") # light red
         self.tree.tag_configure("soon", background="#FFF7E0")    # light amber
+        self.tree.tag_configure("reorder", foreground="#E65100", font=("Calibri", 11, "bold"))
 
-        self.refresh_table()
-
-        # one-time popup notification when entering maintenance
-        self._maybe_notify_expiries()
+        # one-time popup notification when entering maintenance, once the table is loaded
+        self.refresh_table(then=self._maybe_notify_expiries)
 
     def _parse_date(self, s):
         s = (s or "").strip()
@@ -511,9 +1085,9 @@ class BigTabPOS:
         if not d["quantity"]: d["quantity"]="0"
         # validate numerics
         try:
-            up = float(d["unit_price"]) if d["unit_price"] else 0.0
-            sp = float(d["selling_price"]); qty = int(d["quantity"])
-        except:
+            up = to_cents(d["unit_price"])
+            sp = to_cents(d["selling_price"]); qty = int(d["quantity"])
+        except ValueError:
             return messagebox.showerror("Error","Check numeric fields.")
         # validate expiry (optional)
         exp_iso = None
@@ -523,9 +1097,14 @@ class BigTabPOS:
                 return messagebox.showerror("Error","Expiration must be YYYY-MM-DD (e.g., 2025-12-31).")
             exp_iso = exp.isoformat()
 
-        cursor.execute("""INSERT INTO products (category, unit, description, unit_price, selling_price, quantity, expiry_date)
-                          VALUES (?,?,?,?,?,?,?)""",
-                       (d.get("category",""), d.get("unit",""), d["description"], up, sp, qty, exp_iso))
+        cursor.execute("""INSERT INTO products (category, unit, description, unit_price, selling_price,
+                                                 unit_price_c, selling_price_c, quantity, expiry_date)
+                          VALUES (?,?,?,?,?,?,?,?,?)""",
+                       (d.get("category",""), d.get("unit",""), d["description"], up/100, sp/100,
+                        up, sp, qty, exp_iso))
+        pid = cursor.lastrowid
+        record_move(pid, d["description"], "add", qty, qty)
+        log_change("products", "I", pid)
         conn.commit(); self.refresh_table(); messagebox.showinfo("Success","Product added successfully!")
 
     def delete_product(self):
@@ -533,20 +1112,124 @@ class BigTabPOS:
         if not sel: return messagebox.showwarning("Warning","Select a product to delete!")
         pid = self.tree.item(sel[0])["values"][0]
         if messagebox.askyesno("Confirm Delete","Delete this product?"):
+            cursor.execute("SELECT description, COALESCE(quantity,0) FROM products WHERE id=?", (pid,))
+            r = cursor.fetchone()
+            if r: record_move(pid, r[0], "delete", -r[1], 0)
             cursor.execute("DELETE FROM products WHERE id=?", (pid,))
+            cursor.execute("DELETE FROM product_stats WHERE product_id=?", (pid,))
+            log_change("products", "D", pid)
             conn.commit(); self.refresh_table(); messagebox.showinfo("Deleted","Product deleted successfully!")
 
-    def refresh_table(self):
-        """Reload table + update expiry counters and banner."""
+    def _with_selected_product(self, then):
+        """Look up the selected row's current description/stock, then call then(pid, desc, qty)."""
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showwarning("Warning","Select a product first!"); return
+        pid = self.tree.item(sel[0])["values"][0]
+        def query(db):
+            return db.execute("SELECT description, COALESCE(quantity,0) FROM products WHERE id=?", (pid,)).fetchone()
+        self._read("selected_product", self.tree, query, lambda r: then(pid, r[0], r[1]) if r else None)
+
+    def _set_stock(self, pid, desc, kind, delta, new_qty):
+        cursor.execute("UPDATE products SET quantity=? WHERE id=?", (new_qty, pid))
+        record_move(pid, desc, kind, delta, new_qty)
+        log_change("products", "U", pid)
+        conn.commit(); self.refresh_table()
+
+    def restock_product(self):
+        def ask(pid, desc, cur):
+            add = simpledialog.askinteger("Restock", f"{desc}\nCurrent stock: {cur}\n\nQuantity received:",
+                                          parent=self.root, minvalue=1)
+            if not add: return
+            self._set_stock(pid, desc, "restock", add, cur + add)
+        self._with_selected_product(ask)
+
+    def adjust_stock(self):
+        def ask(pid, desc, cur):
+            counted = simpledialog.askinteger("Adjust Stock", f"{desc}\nRecorded stock: {cur}\n\nActual count:",
+                                              parent=self.root, minvalue=0)
+            if counted is None or counted == cur: return
+            self._set_stock(pid, desc, "adjust", counted - cur, counted)
+        self._with_selected_product(ask)
+
+    def reorder_window(self):
+        """Products whose stock will run out within reorder_horizon_days, soonest first."""
+        win = tk.Toplevel(self.root); win.title("Reorder Soon"); win.config(bg="#F5DEB3")
+        win.geometry("700x420")
+        tk.Label(win, text=f"🛒 Runs out within {self.reorder_horizon_days} day(s)", font=("Poppins", 14, "bold"),
+                 bg="#F5DEB3", fg="#8B0000").pack(anchor="w", padx=12, pady=(10,6))
+        cols = ("ID","Description","Stock","Sold/day","Cover (d)")
+        tv = ttk.Treeview(win, columns=cols, show="headings", height=14)
+        for c,w in zip(cols,(60,320,80,100,100)):
+            tv.heading(c, text=c, anchor="center"); tv.column(c, width=w, anchor="center")
+        tv.tag_configure("oddrow", background="#FFFFFF"); tv.tag_configure("evenrow", background="#F9F9F9")
+        tv.pack(fill="both", expand=True, padx=12, pady=(0,12))
+
+        horizon = self.reorder_horizon_days
+        def query(db):
+            vel = load_velocities(db)
+            due = []
+            for pid, desc, qty in db.execute("SELECT id, description, COALESCE(quantity,0) FROM products"):
+                v = vel.get(pid, 0.0)
+                cover = days_of_cover(qty, v)
+                if cover is not None and cover <= horizon:
+                    due.append((cover, pid, desc, qty, v))
+            return sorted(due)
+        def fill(due):
+            for i,(cover, pid, desc, qty, v) in enumerate(due):
+                tv.insert("", "end", values=(pid, desc, qty, f"{v:.2f}", f"{cover:.1f}"),
+                          tags=("evenrow" if i%2==0 else "oddrow",))
+        self._read("reorder", tv, query, fill)
+
+    def stock_history_window(self):
+        """Stock on a past date and the movements within a date range."""
+        win = tk.Toplevel(self.root); win.title("Stock History"); win.config(bg="#F5DEB3")
+        win.geometry("900x520")
+        top = tk.Frame(win, bg="#F5DEB3"); top.pack(fill="x", padx=12, pady=10)
+        rng = {"s": dt.date.today(), "e": dt.date.today()}
+        cols = ("ID","Description","Opening","Added","Restocked","Sold","Adjusted","Closing")
+        tv = ttk.Treeview(win, columns=cols, show="headings", height=18)
+        for c,w in zip(cols,(60,300,90,80,90,80,90,90)):
+            tv.heading(c, text=c, anchor="center"); tv.column(c, width=w, anchor="center")
+        tv.tag_configure("oddrow", background="#FFFFFF"); tv.tag_configure("evenrow", background="#F9F9F9")
+        tv.pack(fill="both", expand=True, padx=12, pady=(0,12))
+
+        def fill(rows):
+            tv.delete(*tv.get_children())
+            for i,row in enumerate(rows):
+                tv.insert("", "end", values=row, tags=("evenrow" if i%2==0 else "oddrow",))
+        def load():
+            s, e = rng["s"], rng["e"]
+            self._read("stock_history", tv, lambda db: stock_movement_report(s, e, db), fill)
+        def pick():
+            rp = RangePicker(win, rng["s"], rng["e"]); win.wait_window(rp.win)
+            if rp.result:
+                rng["s"], rng["e"] = rp.result
+                btn.config(text=f"📅 {rng['s']}  →  {rng['e']}"); load()
+        btn = ttk.Button(top, text=f"📅 {rng['s']}  →  {rng['e']}", command=pick); btn.pack(side="left")
+        tk.Label(top, text="   Closing = stock at end of the last day (pick one day for stock as of that date)",
+                 font=("Poppins", 10), bg="#F5DEB3", fg="#8B0000").pack(side="left")
+        load()
+
+    def refresh_table(self, then=None):
+        """Reload table + update expiry counters and banner (in the background); then() runs after."""
+        def query(db):
+            rows = db.execute(f"""SELECT id, COALESCE(category,''), unit, description,
+                                         {cents_sql('unit_price')}, {cents_sql('selling_price')}, quantity, expiry_date
+                                  FROM products ORDER BY description COLLATE NOCASE""").fetchall()
+            return rows, load_velocities(db)
+        def done(result):
+            self._fill_table(*result)
+            if then: then()
+        self._read("products_table", self.tree, query, done)
+
+    def _fill_table(self, rows, vel):
         self.tree.delete(*self.tree.get_children())
-        cursor.execute("""SELECT id, COALESCE(category,''), unit, description, unit_price, selling_price, quantity, expiry_date
-                          FROM products ORDER BY description COLLATE NOCASE""")
-        rows = cursor.fetchall()
-
         today = dt.date.today()
         expired_count = 0
         soon_count = 0
         ok_count = 0
+        reorder_count = 0
 
         for i,row in enumerate(rows):
             pid, cat, unit, desc, up, sp, qty, exp_str = row
@@ -566,13 +1249,17 @@ class BigTabPOS:
                     ok_count += 1
             else:
                 ok_count += 1
+            cover = days_of_cover(qty, vel.get(pid, 0.0))
+            if cover is not None and cover <= self.reorder_horizon_days:
+                reorder_count += 1
+                tags.append("reorder")
 
             self.tree.insert("", "end",
                              values=(pid, cat, unit, desc,
-                                     f"{float(up or 0):.2f}",
-                                     f"{float(sp or 0):.2f}",
+                                     fmt_cents(up),
+                                     fmt_cents(sp),
                                      qty, (exp_dt.isoformat() if exp_dt else ""),
-                                     days_left),
+                                     days_left, ("—" if cover is None else f"{cover:.1f}")),
                              tags=tuple(tags))
 
         # update banner chips if present
@@ -580,6 +1267,7 @@ class BigTabPOS:
             self.notif_labels["expired"].set(f"Expired: {expired_count}")
             self.notif_labels["soon"].set(f"Expiring ≤{self.expiry_threshold_days}d: {soon_count}")
             self.notif_labels["ok"].set(f"OK: {ok_count}")
+            self.notif_labels["reorder"].set(f"Reorder ≤{self.reorder_horizon_days}d: {reorder_count}")
 
         # store for popup logic
         self._last_expired_count = expired_count
@@ -647,38 +1335,144 @@ class BigTabPOS:
         self.load_sales()
 
     def load_sales(self):
-        sql = """SELECT id, created_at, description, qty, price_each, total, payment, change
-                 FROM sales WHERE 1=1"""
+        where = " WHERE 1=1"
         params=[]
         df=(self.rep_from_var.get() or "").strip()
         dt_=(self.rep_to_var.get() or "").strip()
         kw=(self.rep_kw_var.get() or "").strip()
-        if df: sql+=" AND DATE(created_at)>=DATE(?)"; params.append(df)
-        if dt_: sql+=" AND DATE(created_at)<=DATE(?)"; params.append(dt_)
-        if kw: sql+=" AND description LIKE ?"; params.append(f"%{kw}%")
-        sql+=" ORDER BY created_at DESC, id DESC"
-
+        # local calendar days -> UTC bounds on created_at (same days as ANALYTICS; uses idx_sales_created)
+        d_from, d_to = self._parse_date(df), self._parse_date(dt_)
+        if d_from: where+=" AND created_at>=?"; params.append(local_midnight_utc(d_from))
+        if d_to: where+=" AND created_at<?"; params.append(local_midnight_utc(d_to + dt.timedelta(days=1)))
+        if kw: where+=" AND description LIKE ?"; params.append(f"%{kw}%")
+        sql = (f"SELECT id, created_at, description, qty, {cents_sql('price_each')}, {SALE_TOTAL_C}, "
+               f"{cents_sql('payment')}, {cents_sql('change')} FROM sales" + where +
+               " ORDER BY created_at DESC, id DESC")
+
+        def query(db):
+            rows = db.execute(sql, params).fetchall()
+            # exact integer sum in SQL
+            income = db.execute(f"SELECT COALESCE(SUM({SALE_TOTAL_C}),0) FROM sales" + where, params).fetchone()[0]
+            return rows, income
+        self._read("sales", self.rep_tv, query, self._fill_sales)
+
+    def _fill_sales(self, result):
+        rows, income = result
         self.rep_tv.delete(*self.rep_tv.get_children())
-        income=0.0
-        cursor.execute(sql, params)
-        for i,row in enumerate(cursor.fetchall()):
+        for i,row in enumerate(rows):
             rid,when,desc,qty,pe,tot,pay,chg=row
-            sale_total = float(tot or 0.0)
-            if sale_total == 0.0:
-                try:
-                    sale_total = float(qty or 0) * float(pe or 0)
-                except:
-                    sale_total = 0.0
-            income += sale_total
-
             self.rep_tv.insert("", "end",
                                values=(rid,when,desc,qty,
-                                       f"{float(pe or 0):.2f}",
-                                       f"{sale_total:.2f}",
-                                       f"{float(pay or 0):.2f}",
-                                       f"{float(chg or 0):.2f}"),
+                                       fmt_cents(pe), fmt_cents(tot), fmt_cents(pay), fmt_cents(chg)),
                                tags=("evenrow" if i%2==0 else "oddrow",))
-        self.rep_total_var.set(f"{income:,.2f}")
+        self.rep_total_var.set(fmt_cents(income, grouping=True))
+
+    # ================= ANALYTICS (vectorized breakdowns) =================
+    def analytics_tab(self):
+        page = tk.Frame(self.content, bg="#F5DEB3"); page.pack(fill="both", expand=True, padx=12, pady=10)
+        tk.Label(page, text="📈 SALES ANALYTICS", font=("Poppins", 20, "bold"),
+                 bg="#F5DEB3", fg="#8B0000").pack(anchor="w", pady=(0,10))
+        if analytics is None:
+            tk.Label(page, text="Analytics needs NumPy.  Install it with:  pip install numpy",
+                     font=("Poppins", 12), bg="#F5DEB3").pack(anchor="w")
+            return
+
+        top = tk.Frame(page, bg="#F5DEB3"); top.pack(fill="x", pady=(0,8))
+        today = dt.date.today()
+        self.an_range = (today - dt.timedelta(days=6), today)
+        def open_picker():
+            rp = RangePicker(self.root, *self.an_range); self.root.wait_window(rp.win)
+            if rp.result:
+                self.an_range = rp.result; self.load_analytics()
+        self.an_date_btn = ttk.Button(top, text="📅 Date Range", command=open_picker); self.an_date_btn.pack(side="left")
+        self.an_compare_var = tk.StringVar(value="")
+        tk.Label(top, textvariable=self.an_compare_var, font=("Poppins", 12, "bold"),
+                 bg="#F5DEB3", fg="#8B0000").pack(side="left", padx=12)
+
+        body = tk.Frame(page, bg="#F5DEB3"); body.pack(fill="both", expand=True)
+        left = tk.Frame(body, bg="#F5DEB3"); left.pack(side="left", fill="both", expand=True)
+        right = tk.Frame(body, bg="#F5DEB3"); right.pack(side="right", fill="y", padx=(10,0))
+
+        def mk_tv(parent, title, cols, widths, height):
+            tk.Label(parent, text=title, font=("Poppins", 12, "bold"), bg="#F5DEB3", fg="#8B0000").pack(anchor="w")
+            tv = ttk.Treeview(parent, columns=cols, show="headings", height=height)
+            for c,w in zip(cols, widths):
+                tv.heading(c, text=c, anchor="center"); tv.column(c, width=w, anchor="center")
+            tv.tag_configure("oddrow", background="#FFFFFF"); tv.tag_configure("evenrow", background="#F9F9F9")
+            tv.pack(fill="both", expand=True, pady=(4,8))
+            return tv
+        self.an_prod_tv = mk_tv(left, "Top sellers", ("#","Description","Qty","Sales"), (40,300,70,110), 10)
+        self.an_cat_tv = mk_tv(left, "By category", ("Category","Qty","Sales"), (300,70,110), 6)
+
+        tk.Label(right, text="Sales by weekday × hour", font=("Poppins", 12, "bold"),
+                 bg="#F5DEB3", fg="#8B0000").pack(anchor="w")
+        self.an_heat = tk.Canvas(right, width=40+24*22, height=20+7*22, bg="white", highlightthickness=0)
+        self.an_heat.pack(pady=(4,8))
+        tk.Label(right, text="Daily sales (bars) and 7-day average (line)", font=("Poppins", 12, "bold"),
+                 bg="#F5DEB3", fg="#8B0000").pack(anchor="w")
+        self.an_trend = tk.Canvas(right, width=40+24*22, height=200, bg="white", highlightthickness=0)
+        self.an_trend.pack(pady=(4,0))
+        self.load_analytics()
+
+    def load_analytics(self):
+        s, e = self.an_range
+        self.an_date_btn.config(text=f"📅 {s}  →  {e}")
+        days = (e - s).days + 1
+        def query(db):
+            # one pass over sales: the previous period (for comparison and to warm up the
+            # 7-day average) plus the selected one
+            full = analytics.load_sales_frame(db, s - dt.timedelta(days=max(days, 6)), e, SALE_TOTAL_C)
+            cur = analytics.subset(full, s, e)
+            prev = analytics.subset(full, s - dt.timedelta(days=days), s - dt.timedelta(days=1))
+            daily_all = analytics.daily_totals(full)
+            return (analytics.compare_periods(cur, prev), analytics.by_product(cur, top=50),
+                    analytics.by_category(cur), analytics.hour_weekday_matrix(cur),
+                    daily_all[-days:], analytics.moving_average(daily_all, 7)[-days:])
+        self._read("analytics", self.an_prod_tv, query, lambda r: self._fill_analytics(days, *r))
+
+    def _fill_analytics(self, days, compare, top, cats, heat, daily, ma):
+        cur_total, prev_total, pct = compare
+        delta = "n/a" if pct is None else f"{pct:+.1f}%"
+        self.an_compare_var.set(f"₱{fmt_cents(cur_total, True)}  vs previous {days} day(s) "
+                                f"₱{fmt_cents(prev_total, True)}  ({delta})")
+
+        for tv, rows in ((self.an_prod_tv, [(i+1, d, q, fmt_cents(t, True)) for i,(_, d, q, t) in enumerate(top)]),
+                         (self.an_cat_tv, [(c, q, fmt_cents(t, True)) for c, q, t in cats])):
+            tv.delete(*tv.get_children())
+            for i,row in enumerate(rows):
+                tv.insert("", "end", values=row, tags=("evenrow" if i%2==0 else "oddrow",))
+
+        self._draw_heatmap(heat)
+        self._draw_trend(daily, ma)
+
+    def _draw_heatmap(self, m):
+        c = self.an_heat; c.delete("all")
+        cell, x0, y0 = 22, 40, 20
+        hi = float(m.max()) or 1.0
+        for h in range(0, 24, 3):
+            c.create_text(x0 + h*cell + cell/2, y0/2, text=str(h), font=("Calibri", 9))
+        for r, wd in enumerate(analytics.WEEKDAYS):
+            c.create_text(x0/2, y0 + r*cell + cell/2, text=wd, font=("Calibri", 9))
+            for h in range(24):
+                k = float(m[r, h]) / hi   # 0 → white, 1 → brand red
+                color = "#%02x%02x%02x" % (int(255 - k*(255-0x8B)), int(255 - k*255), int(255 - k*255))
+                c.create_rectangle(x0 + h*cell, y0 + r*cell, x0 + (h+1)*cell, y0 + (r+1)*cell,
+                                   fill=color, outline="#EEEEEE")
+
+    def _draw_trend(self, daily, ma):
+        c = self.an_trend; c.delete("all")
+        w, h, pad = int(c["width"]), int(c["height"]), 20
+        n = len(daily)
+        if not n: return
+        hi = max(float(daily.max()), float(ma.max())) or 1.0
+        step = (w - 2*pad) / n
+        y = lambda v: h - pad - (h - 2*pad) * float(v) / hi
+        for i, v in enumerate(daily):
+            c.create_rectangle(pad + i*step + 1, y(v), pad + (i+1)*step - 1, h - pad, fill="#F5DEB3", outline="")
+        pts = []
+        for i, v in enumerate(ma): pts += [pad + (i+0.5)*step, y(v)]
+        if len(pts) >= 4: c.create_line(*pts, fill="#8B0000", width=2)
+        c.create_text(pad, pad/2, text=f"max ₱{hi/100:,.0f}", anchor="w", font=("Calibri", 9))
 
 
 # ---------- Single-month date-range picker ----------
@@ -777,7 +1571,16 @@ class RangePicker:
 
 
 # ------------------ RUN (no login) ------------------
+# Sync commands (no GUI):
+#   python ronys.py export <since_seq> <out.jsonl>
+#   python ronys.py import <central.db> <in.jsonl>   (handled near the top, before DB setup)
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        if len(sys.argv) != 4 or not sys.argv[2].isdigit(): sys.exit(SYNC_USAGE)
+        last = export_changes(int(sys.argv[2]), sys.argv[3])
+        print(f"Exported up to seq {last}. Use it as <since_seq> next time.")
+        sys.exit(0)
+    if len(sys.argv) > 1: sys.exit(SYNC_USAGE)
     root = tk.Tk()
     BigTabPOS(root)
     root.mainloop()